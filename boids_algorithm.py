@@ -20,9 +20,41 @@ SMOOTHING_WEIGHT = 0.35
 
 RAD_TO_DEG = 180/pi
 VIEWRANGE_SQ = BOID_VIEWRANGE_PX**2
+GRID_CELL_PX = BOID_VIEWRANGE_PX
+ROTATION_STEP_DEG = 5
+
+# Scales the previous heading vector (length VELOCITY) back to unit length as part of the smoothing blend
+SMOOTHING_PREV_SCALE = (1 - SMOOTHING_WEIGHT)/VELOCITY
 
 boid_locations = []
 boid_heading_vectors = []
+boid_grid = {}
+
+def build_boid_images():
+	"""
+	Draws the boid sprite (an arrow shape) and pre-rotates it into one image per ROTATION_STEP_DEG degrees of heading
+	Rotating once up front means the per-frame rotation is just a list lookup, instead of creating a new Surface per boid per frame
+	"""
+	base_image = pygame.Surface([10, 15], pygame.SRCALPHA)
+	pygame.draw.polygon(base_image, BOID_COLOUR, [(0, 15), (5, 0), (10, 15), (5, 10)])
+
+	return [pygame.transform.rotate(base_image, -angle) for angle in range(0, 360, ROTATION_STEP_DEG)]
+
+BOID_IMAGES = build_boid_images()
+
+def rebuild_grid(_locations=boid_locations, _grid=boid_grid, _cell=GRID_CELL_PX):
+	"""
+	Rebuilds the spatial grid, binning each boid's index by the grid cell its location falls in
+	Cells are BOID_VIEWRANGE_PX wide, so a boid's viewrange is always covered by the 3x3 block of cells around it
+	The underscored default arguments bind module globals as locals, saving a dict lookup per access in the loop
+	"""
+	_grid.clear()
+
+	for i in range(len(_locations)):
+		location = _locations[i]
+		cell = (int(location.x)//_cell, int(location.y)//_cell)
+
+		_grid.setdefault(cell, []).append(i)
 
 class Boid(pygame.sprite.Sprite):
 	def __init__(self, i):
@@ -31,10 +63,10 @@ class Boid(pygame.sprite.Sprite):
 		# Saving boid index
 		self.boid_no = i
 
-		# Generating the boid sprite's image (an arrow shape)
-		self.image = pygame.Surface([10, 15], pygame.SRCALPHA)
-		pygame.draw.polygon(self.image, BOID_COLOUR, [(0, 15), (5, 0), (10, 15), (5, 10)])
+		# The boid sprite's images are shared between all boids - rotate_boid just picks the right pre-rotated one
+		self.image = BOID_IMAGES[0]
 		self.rect = self.image.get_rect()
+		self.rotation_index = 0
 
 		# Randomising the boid's position on the screen and heading vector
 		pos_vec = pygame.math.Vector2(randint(0, WIDTH), randint(0, HEIGHT))
@@ -45,100 +77,139 @@ class Boid(pygame.sprite.Sprite):
 		boid_locations.append(pos_vec)
 		boid_heading_vectors.append(heading_vec)
 
-		# Setting position/heading and original boid image
+		# Setting position/heading
 		self.rect.x = pos_vec.x
 		self.rect.y = pos_vec.y
-		self.original_image = self.image
 
 		# Rotating the boid to a random heading
 		self.rotate_boid(heading_vec)
 
+		# Where the boid was last drawn, so the main loop can erase just that patch of the screen
+		self.prev_rect = self.rect.copy()
+
 	def safe_normalize(self, vector):
 		"""
 		Handles normalization of pygame.math.Vector2() vectors that potentially have zero length
+		Checked explicitly rather than catching the ValueError - try/except is expensive as control flow
 		"""
-		try:
-			vector = vector.normalize()
-		except ValueError:
-			vector.x = 0
-			vector.y = 0
+		if vector.magnitude_squared() > 0:
+			return vector.normalize()
 
 		return vector
 
 	def rotate_boid(self, headingvec):
 		"""
-		Rotating the boid (from the original image, to avoid distortion) to point in a certain vector
+		Pointing the boid along a certain vector by picking the nearest pre-rotated image
 		"""
-		heading = (atan2(headingvec.x, -headingvec.y)*RAD_TO_DEG)%360
+		heading = atan2(headingvec.x, -headingvec.y)*RAD_TO_DEG
+
+		# atan2 only lands in (-180, 180], so one branch wraps to [0, 360) - cheaper than the generic float modulo
+		if heading < 0:
+			heading += 360
+
+		index = int(heading)//ROTATION_STEP_DEG
+
+		# The image and rect only need replacing when the heading crosses into a new rotation bucket
+		if index == self.rotation_index:
+			return
 
-		self.image = pygame.transform.rotate(self.original_image, -heading)
+		self.rotation_index = index
+		self.image = BOID_IMAGES[index]
 
 		# Creating the new rect with the same centre as the old rect
 		old_centre = self.rect.center
 		self.rect = self.image.get_rect(center=old_centre)
 
-	def find_local_boids(self):
+	def find_local_boids(self, _locations=boid_locations, _grid=boid_grid, _cell=GRID_CELL_PX, _viewrange=BOID_VIEWRANGE_PX, _viewrange_sq=VIEWRANGE_SQ):
 		"""
-		Computes the distance to each boid and determines whether it's within the current boid's viewrange
+		Finds the boids within the current boid's viewrange, only checking candidates from the 3x3 block of grid cells around it
+		The underscored default arguments bind module globals as locals, saving a dict lookup per access in the hot loop
 		"""
 		local_boids = []
+		my_boid_no = self.boid_no
+		my_vector = _locations[my_boid_no]
+		my_x = my_vector.x
+		my_y = my_vector.y
 
-		for i in range(len(boid_locations)):
-			if i == self.boid_no:
-				continue
+		cell_x = int(my_x)//_cell
+		cell_y = int(my_y)//_cell
+		get_cell = _grid.get
 
-			d_vector = boid_locations[i] - boid_locations[self.boid_no]
+		for dx in (-1, 0, 1):
+			for dy in (-1, 0, 1):
+				for i in get_cell((cell_x + dx, cell_y + dy), ()):
+					if i == my_boid_no:
+						continue
 
-			if d_vector.magnitude_squared() < VIEWRANGE_SQ:
-				local_boids.append(i)
+					location = _locations[i]
 
-		return local_boids
+					# Bounding-box pre-filter: the 3x3 cell block is much bigger than the view circle, so most
+					# candidates can be rejected with two compares before the multiply-heavy distance test
+					d_x = location.x - my_x
+					if d_x >= _viewrange or d_x <= -_viewrange:
+						continue
 
-	def alignment(self, local_boids):
-		"""
-		Computes the average heading of the local boids
-		"""
-		vector = pygame.math.Vector2(0, 0)
+					d_y = location.y - my_y
+					if d_y >= _viewrange or d_y <= -_viewrange:
+						continue
 
-		for i in local_boids:
-			vector += boid_heading_vectors[i]
+					if d_x*d_x + d_y*d_y < _viewrange_sq:
+						local_boids.append(i)
 
-		return self.safe_normalize(vector)
+		return local_boids
 
-	def cohesion(self, local_boids):
+	def compute_forces(self, local_boids, _locations=boid_locations, _headings=boid_heading_vectors):
 		"""
-		Computes the centre of mass of the local boids and a vector to it from the current boid's location
+		Computes the combined alignment/cohesion/separation steering vector in a single pass over the local boids,
+		accumulating all three sums side by side rather than traversing the boid lists three times
+		Each force is pre-scaled to order-one magnitude rather than normalized - the combined steering vector
+		is only scaled once, in smoothing(), saving a square root per force per boid
 		"""
-		com_vector = pygame.math.Vector2(0, 0)
-		my_vector = boid_locations[self.boid_no]
-
-		# Summing up the position vectors of other local boids
+		my_vector = _locations[self.boid_no]
+		my_x = my_vector.x
+		my_y = my_vector.y
+
+		align_x = 0.0
+		align_y = 0.0
+		com_x = 0.0
+		com_y = 0.0
+		sep_x = 0.0
+		sep_y = 0.0
+
+		# Accumulating plain floats - building intermediate Vector2s in the loop costs an allocation per neighbour
 		for i in local_boids:
-			com_vector += boid_locations[i]
+			# Alignment: summing the heading vectors of the local boids
+			heading = _headings[i]
+			align_x += heading.x
+			align_y += heading.y
 
-		# Calculating the mean position
-		com_vector /= len(local_boids)
+			# Cohesion: summing the position vectors of the local boids
+			location = _locations[i]
+			com_x += location.x
+			com_y += location.y
 
-		# Computing the vector between me and the mean position
-		d_vector = com_vector - my_vector
+			# Separation: summing the vector from each local boid to this boid divided by the square of the distance
+			# Results in small vector at large distances, very large vector at small distances
+			d_x = my_x - location.x
+			d_y = my_y - location.y
 
-		return self.safe_normalize(d_vector)
+			inv_dist_sq = 1/max(d_x*d_x + d_y*d_y, 1)
+			sep_x += d_x*inv_dist_sq
+			sep_y += d_y*inv_dist_sq
 
-	def separation(self, local_boids):
-		"""
-		Calculates a steering vector to avoid crashing into other local boids
-		"""
-		sep_vector = pygame.math.Vector2(0, 0)
-		my_vector = boid_locations[self.boid_no]
+		num_local = len(local_boids)
 
-		# Sums up the vector from other local boids to this boid divided by the square of the distance between them
-		# Results in small vector at large distances, very large vector at small distances
-		for i in local_boids:
-			d_vector = my_vector - boid_locations[i]
+		# Alignment becomes the average heading, scaled to magnitude at most 1 (the headings have length VELOCITY)
+		align_scale = ALIGN_WEIGHT/(num_local*VELOCITY)
+
+		# Cohesion becomes the vector to the local centre of mass, scaled by the viewrange so its magnitude is at most 1
+		cohesion_scale = COHESION_WEIGHT/BOID_VIEWRANGE_PX
 
-			sep_vector += d_vector/max(d_vector.magnitude_squared(), 1)
+		# Combining vectors with their weights
+		steering_x = align_x*align_scale + (com_x/num_local - my_x)*cohesion_scale + sep_x*SEPARATION_WEIGHT
+		steering_y = align_y*align_scale + (com_y/num_local - my_y)*cohesion_scale + sep_y*SEPARATION_WEIGHT
 
-		return self.safe_normalize(sep_vector)
+		return pygame.math.Vector2(steering_x, steering_y)
 
 	def bounce_at_boundary(self, vel_vector):
 		"""
@@ -159,10 +230,9 @@ class Boid(pygame.sprite.Sprite):
 	def smoothing(self, vector):
 		"""
 		Exponential smoothing of the Boid's velocity vector by looking at its previous velocity vector
-		Also scales the vector to be of length VELOCITY
+		Blends first and scales to length VELOCITY once at the end, rather than rescaling both before and after the blend
 		"""
-		vector.scale_to_length(VELOCITY)
-		vector = vector*SMOOTHING_WEIGHT + (1-SMOOTHING_WEIGHT)*boid_heading_vectors[self.boid_no]
+		vector = vector*SMOOTHING_WEIGHT + SMOOTHING_PREV_SCALE*boid_heading_vectors[self.boid_no]
 		vector.scale_to_length(VELOCITY)
 
 		return vector
@@ -171,19 +241,16 @@ class Boid(pygame.sprite.Sprite):
 		"""
 		Updates the boid's position
 		"""
+		# Remembering where the boid was drawn last frame
+		self.prev_rect = self.rect.copy()
+
 		local_boids = self.find_local_boids()
 
-		steering_vector = pygame.math.Vector2(0, 0)
 		randomised_vector = pygame.math.Vector2(uniform(-0.2, 0.2), uniform(-0.2, 0.2))
 
-		# If there are local boids, use them to adjust your heading vector
+		# If there are local boids, use them to adjust your heading vector, with a small random factor as well
 		if len(local_boids) != 0:
-			alignment_vector = self.alignment(local_boids)
-			cohesion_vector = self.cohesion(local_boids)
-			separation_vector = self.separation(local_boids)
-
-			# Combining vectors, with a small random factor as well
-			steering_vector = alignment_vector*ALIGN_WEIGHT + cohesion_vector*COHESION_WEIGHT + separation_vector*SEPARATION_WEIGHT + randomised_vector
+			steering_vector = self.compute_forces(local_boids) + randomised_vector
 
 		# Else, just slightly randomise your heading vector
 		else:
@@ -217,6 +284,9 @@ if __name__ == "__main__":
 	screen.fill(BACKGROUND_COLOUR)
 	pygame.display.set_caption("Boid's Algorithm")
 
+	# Presenting the freshly filled background once - the loop below only ever pushes the dirty rects
+	pygame.display.flip()
+
 	# Creating the sprite group
 	boids = pygame.sprite.Group()
 
@@ -234,12 +304,23 @@ if __name__ == "__main__":
 		# Setting max frame rate to 24fps
 		clock.tick(24)
 
-		# Clears the screen in the new frame
-		screen.fill(BACKGROUND_COLOUR)
+		# Rebuilds the spatial grid from the boids' current locations
+		rebuild_grid()
 
-		# Runs the boid update function, draws them on the screen, and then updates the screen
+		# Runs the boid update function
 		boids.update()
-		boids.draw(screen)
-		pygame.display.flip()
+
+		# Erases each boid's previous patch of the screen and redraws, pushing only the changed rects to
+		# the display instead of filling and flipping the whole screen every frame
+		# blits() batches all the boids into one call, rather than Group.draw()'s blit per sprite
+		dirty_rects = []
+
+		for boid in boids:
+			screen.fill(BACKGROUND_COLOUR, boid.prev_rect)
+			dirty_rects.append(boid.prev_rect)
+			dirty_rects.append(boid.rect)
+
+		screen.blits([(boid.image, boid.rect) for boid in boids])
+		pygame.display.update(dirty_rects)
 
 	pygame.quit()
\ No newline at end of file
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+
+from math import pi, atan2
+import numpy as np
+import pygame
+
+# The compiled kernels are optional - the flocking maths uses the first one available, falling back to NumPy broadcasting
+# The Cython kernel (build with 'python setup.py build_ext --inplace') is compiled ahead of time, so it's preferred
+# over Numba, which JIT-compiles on first run
+try:
+	import boids_kernel
+	CYTHON_AVAILABLE = True
+except ImportError:
+	CYTHON_AVAILABLE = False
+
+try:
+	from numba import njit, prange
+	NUMBA_AVAILABLE = True
+except ImportError:
+	NUMBA_AVAILABLE = False
+
+try:
+	import cupy as cp
+	CUPY_AVAILABLE = True
+except ImportError:
+	CUPY_AVAILABLE = False
+
+# Constants
+WIDTH = 1500
+HEIGHT = 900
+BACKGROUND_COLOUR = (0, 0, 64)
+BOID_COLOUR = (255, 255, 255)
+NUM_BOIDS = 50
+BOID_VIEWRANGE_PX = 75
+VELOCITY = 10 # px per frame
+
+ALIGN_WEIGHT = 0.7
+COHESION_WEIGHT = 0.25
+SEPARATION_WEIGHT = 0.4
+SMOOTHING_WEIGHT = 0.35
+
+RAD_TO_DEG = 180/pi
+VIEWRANGE_SQ = BOID_VIEWRANGE_PX**2
+ROTATION_STEP_DEG = 5
+
+# Scales the previous heading vectors (length VELOCITY) back to unit length as part of the smoothing blend
+SMOOTHING_PREV_SCALE = (1 - SMOOTHING_WEIGHT)/VELOCITY
+
+# Screen coordinates only span a few thousand pixels, so single precision is plenty - float32 halves the bytes
+# every kernel has to move and doubles the SIMD lanes per register
+DTYPE = np.float32
+
+# For flocks of thousands of boids even the compiled CPU kernels bottleneck on the N^2 pair loop, which is
+# embarrassingly parallel and a good fit for the GPU - if CuPy is installed and the flock is big enough to
+# cover the cost of shipping the state across the bus each frame, the steering runs on the GPU instead
+GPU_MIN_BOIDS = 2000
+GPU_AVAILABLE = CUPY_AVAILABLE and NUM_BOIDS >= GPU_MIN_BOIDS
+
+# All per-boid numerical state lives in one contiguous (N, 4) block - columns 0-1 are the position, 2-3 the heading -
+# so the whole flock's per-frame data sits in a single small allocation that stays resident in cache
+# The rest of the module works through these two views into it
+boid_state = np.zeros((NUM_BOIDS, 4), dtype=DTYPE)
+boid_positions = boid_state[:, :2]
+boid_headings = boid_state[:, 2:]
+
+rng = np.random.default_rng()
+
+def build_boid_images():
+	"""
+	Draws the boid sprite (an arrow shape) and pre-rotates it into one image per ROTATION_STEP_DEG degrees of heading
+	Rotating once up front means the per-frame rotation is just a list lookup, instead of creating a new Surface per boid per frame
+	"""
+	base_image = pygame.Surface([10, 15], pygame.SRCALPHA)
+	pygame.draw.polygon(base_image, BOID_COLOUR, [(0, 15), (5, 0), (10, 15), (5, 10)])
+
+	return [pygame.transform.rotate(base_image, -angle) for angle in range(0, 360, ROTATION_STEP_DEG)]
+
+BOID_IMAGES = build_boid_images()
+
+def normalize_rows(vectors):
+	"""
+	Normalizes each row of an (N, 2) array to unit length, leaving zero-length rows as zero vectors
+	"""
+	lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+
+	return np.divide(vectors, lengths, out=np.zeros_like(vectors), where=lengths > 0)
+
+# Pre-allocated scratch arrays for steering_numpy() - the big (N, N) pairwise tensors are reused every frame
+# instead of being reallocated, which keeps the hot arrays warm in cache and off the allocator
+d_scratch = np.empty((NUM_BOIDS, NUM_BOIDS, 2), dtype=DTYPE)
+dist_sq_scratch = np.empty((NUM_BOIDS, NUM_BOIDS), dtype=DTYPE)
+local_scratch = np.empty((NUM_BOIDS, NUM_BOIDS), dtype=bool)
+
+def steering_numpy():
+	"""
+	Computes the combined alignment/cohesion/separation steering vector for every boid with broadcast NumPy operations
+	Boids with no local boids get their current heading vector back unchanged
+	"""
+	# Pairwise offsets d[i][j] = (position of boid i) - (position of boid j), and the squared distances between each pair
+	np.subtract(boid_positions[:, None, :], boid_positions[None, :, :], out=d_scratch)
+	np.einsum("ijk,ijk->ij", d_scratch, d_scratch, out=dist_sq_scratch)
+
+	# Boids are local to each other if they're within viewrange (a boid is never local to itself)
+	np.less(dist_sq_scratch, VIEWRANGE_SQ, out=local_scratch)
+	np.fill_diagonal(local_scratch, False)
+	num_local = local_scratch.sum(1)
+	local_col = local_scratch[:, :, None]
+
+	# Alignment: the average heading of the local boids
+	alignment = normalize_rows((boid_headings[None, :, :]*local_col).sum(1))
+
+	# Cohesion: the vector from each boid to the centre of mass of its local boids
+	com = (boid_positions[None, :, :]*local_col).sum(1)/np.maximum(num_local, 1)[:, None]
+	cohesion = normalize_rows(com - boid_positions)
+
+	# Separation: sums up the vector from each local boid to this boid divided by the square of the distance between them
+	# Computed in place in the scratch arrays, which are free to clobber by this point
+	np.maximum(dist_sq_scratch, 1, out=dist_sq_scratch)
+	np.divide(d_scratch, dist_sq_scratch[:, :, None], out=d_scratch)
+	np.multiply(d_scratch, local_col, out=d_scratch)
+	separation = normalize_rows(d_scratch.sum(1))
+
+	# Combining vectors
+	steering = alignment*ALIGN_WEIGHT + cohesion*COHESION_WEIGHT + separation*SEPARATION_WEIGHT
+
+	# Boids with no local boids just keep their current heading vector
+	alone = num_local == 0
+	steering[alone] = boid_headings[alone]
+
+	return steering
+
+if NUMBA_AVAILABLE:
+	def make_steering_kernel(num_boids):
+		"""
+		Builds the Numba kernel with the flock size baked in as a closure constant, so LLVM compiles the loops
+		with fixed trip counts it can unroll and vectorise
+		Closure variables rule out Numba's on-disk cache (which wouldn't notice NUM_BOIDS changing between runs
+		anyway), so the one-off JIT warmup happens per process instead
+		"""
+		@njit(parallel=True, fastmath=True)
+		def compute_steering(positions, headings, viewrange_sq, align_weight, cohesion_weight, separation_weight):
+			"""
+			Compiled equivalent of steering_numpy() - one parallel loop over the boids, with the neighbour scan and
+			all three force accumulators fused into the inner loop
+			"""
+			steering = np.empty_like(positions)
+
+			for i in prange(num_boids):
+				align_x = align_y = 0.0
+				com_x = com_y = 0.0
+				sep_x = sep_y = 0.0
+				num_local = 0
+
+				for j in range(num_boids):
+					if j == i:
+						continue
+
+					dx = positions[i, 0] - positions[j, 0]
+					dy = positions[i, 1] - positions[j, 1]
+					dist_sq = dx*dx + dy*dy
+
+					if dist_sq < viewrange_sq:
+						num_local += 1
+
+						align_x += headings[j, 0]
+						align_y += headings[j, 1]
+
+						com_x += positions[j, 0]
+						com_y += positions[j, 1]
+
+						inv_dist_sq = 1/max(dist_sq, 1)
+						sep_x += dx*inv_dist_sq
+						sep_y += dy*inv_dist_sq
+
+				# Boids with no local boids just keep their current heading vector
+				if num_local == 0:
+					steering[i, 0] = headings[i, 0]
+					steering[i, 1] = headings[i, 1]
+					continue
+
+				# Normalizing the alignment vector
+				align_length = (align_x*align_x + align_y*align_y)**0.5
+				if align_length > 0:
+					align_x /= align_length
+					align_y /= align_length
+
+				# Cohesion: normalized vector to the centre of mass of the local boids
+				coh_x = com_x/num_local - positions[i, 0]
+				coh_y = com_y/num_local - positions[i, 1]
+				coh_length = (coh_x*coh_x + coh_y*coh_y)**0.5
+				if coh_length > 0:
+					coh_x /= coh_length
+					coh_y /= coh_length
+
+				# Normalizing the separation vector
+				sep_length = (sep_x*sep_x + sep_y*sep_y)**0.5
+				if sep_length > 0:
+					sep_x /= sep_length
+					sep_y /= sep_length
+
+				# Combining vectors
+				steering[i, 0] = align_x*align_weight + coh_x*cohesion_weight + sep_x*separation_weight
+				steering[i, 1] = align_y*align_weight + coh_y*cohesion_weight + sep_y*separation_weight
+
+			return steering
+
+		return compute_steering
+
+	compute_steering = make_steering_kernel(NUM_BOIDS)
+
+def steering_gpu():
+	"""
+	CuPy version of steering_numpy() - the same broadcast maths, run on the GPU
+	Only the small (N, 2) state arrays cross the bus each frame; the (N, N) pairwise tensors stay on the device
+	"""
+	positions = cp.asarray(boid_positions)
+	headings = cp.asarray(boid_headings)
+
+	# Pairwise offsets and squared distances, as in steering_numpy()
+	d = positions[:, None, :] - positions[None, :, :]
+	dist_sq = (d*d).sum(-1)
+
+	local = dist_sq < VIEWRANGE_SQ
+	cp.fill_diagonal(local, False)
+	num_local = local.sum(1)
+	local_col = local[:, :, None]
+
+	# Row normalization clamps the length away from zero instead of masking, since CuPy ufuncs don't take where=
+	def normalize(vectors):
+		lengths = cp.sqrt((vectors*vectors).sum(1, keepdims=True))
+
+		return vectors/cp.maximum(lengths, 1e-12)
+
+	# The three forces, exactly as in steering_numpy()
+	alignment = normalize((headings[None, :, :]*local_col).sum(1))
+
+	com = (positions[None, :, :]*local_col).sum(1)/cp.maximum(num_local, 1)[:, None]
+	cohesion = normalize(com - positions)
+
+	separation = normalize((d/cp.maximum(dist_sq, 1)[:, :, None]*local_col).sum(1))
+
+	steering = alignment*ALIGN_WEIGHT + cohesion*COHESION_WEIGHT + separation*SEPARATION_WEIGHT
+
+	alone = num_local == 0
+	steering[alone] = headings[alone]
+
+	return cp.asnumpy(steering)
+
+def update_all():
+	"""
+	Updates every boid's position and heading at once
+	Computes the same alignment/cohesion/separation/smoothing/bounce steps as the per-boid version in boids_algorithm.py
+	"""
+	# Combined steering forces, from the fastest available kernel
+	if GPU_AVAILABLE:
+		steering = steering_gpu()
+	elif CYTHON_AVAILABLE:
+		steering = boids_kernel.compute_steering(boid_positions, boid_headings, VIEWRANGE_SQ, ALIGN_WEIGHT, COHESION_WEIGHT, SEPARATION_WEIGHT)
+	elif NUMBA_AVAILABLE:
+		steering = compute_steering(boid_positions, boid_headings, VIEWRANGE_SQ, ALIGN_WEIGHT, COHESION_WEIGHT, SEPARATION_WEIGHT)
+	else:
+		steering = steering_numpy()
+
+	# Adding a small random factor to every boid's steering
+	steering += rng.uniform(-0.2, 0.2, size=(NUM_BOIDS, 2)).astype(DTYPE)
+
+	# Exponential smoothing against the previous heading vector, keeping the speed fixed at VELOCITY
+	# Blends first and scales to length VELOCITY once at the end, rather than rescaling both before and after the blend
+	steering = steering*SMOOTHING_WEIGHT + SMOOTHING_PREV_SCALE*boid_headings
+	steering = normalize_rows(steering)*VELOCITY
+
+	# Reflecting the velocity of any boid that would go over the boundary of the screen
+	new_positions = boid_positions + steering
+	steering[:, 0] = np.where((new_positions[:, 0] < 0) | (new_positions[:, 0] > WIDTH - 20), -steering[:, 0], steering[:, 0])
+	steering[:, 1] = np.where((new_positions[:, 1] < 0) | (new_positions[:, 1] > HEIGHT - 20), -steering[:, 1], steering[:, 1])
+
+	# Updating stored data
+	boid_headings[:] = steering
+	boid_positions[:] += steering
+
+class Boid(pygame.sprite.Sprite):
+	"""
+	The sprite side of a boid - all of the flocking maths lives in update_all(), this just draws row boid_no of the arrays
+	"""
+	def __init__(self, i):
+		super().__init__()
+
+		# Saving boid index
+		self.boid_no = i
+
+		# The boid sprite's images are shared between all boids - rotate_boid just picks the right pre-rotated one
+		self.image = BOID_IMAGES[0]
+		self.rect = self.image.get_rect()
+		self.rotation_index = 0
+
+		# Randomising the boid's position on the screen and heading vector
+		boid_positions[i] = (rng.integers(0, WIDTH + 1), rng.integers(0, HEIGHT + 1))
+		boid_headings[i] = normalize_rows(rng.uniform(-1, 1, size=(1, 2)))[0]
+
+		# Setting position/heading
+		self.rect.x = boid_positions[i][0]
+		self.rect.y = boid_positions[i][1]
+
+		# Rotating the boid to a random heading
+		self.rotate_boid(boid_headings[i])
+
+		# Where the boid was last drawn, so the main loop can erase just that patch of the screen
+		self.prev_rect = self.rect.copy()
+
+	def rotate_boid(self, headingvec):
+		"""
+		Pointing the boid along a certain vector by picking the nearest pre-rotated image
+		"""
+		heading = atan2(headingvec[0], -headingvec[1])*RAD_TO_DEG
+
+		# atan2 only lands in (-180, 180], so one branch wraps to [0, 360) - cheaper than the generic float modulo
+		if heading < 0:
+			heading += 360
+
+		index = int(heading)//ROTATION_STEP_DEG
+
+		# The image and rect only need replacing when the heading crosses into a new rotation bucket
+		if index == self.rotation_index:
+			return
+
+		self.rotation_index = index
+		self.image = BOID_IMAGES[index]
+
+		# Creating the new rect with the same centre as the old rect
+		old_centre = self.rect.center
+		self.rect = self.image.get_rect(center=old_centre)
+
+	def update(self):
+		"""
+		Syncs the sprite's rect and rotation with the boid's row of the arrays, as computed by update_all()
+		"""
+		# Remembering where the boid was drawn last frame
+		self.prev_rect = self.rect.copy()
+
+		self.rotate_boid(boid_headings[self.boid_no])
+
+		self.rect.x = int(boid_positions[self.boid_no][0])
+		self.rect.y = int(boid_positions[self.boid_no][1])
+
+
+if __name__ == "__main__":
+	pygame.init()
+	clock = pygame.time.Clock()
+
+	# Creating the display window
+	screen = pygame.display.set_mode((WIDTH, HEIGHT))
+	screen.fill(BACKGROUND_COLOUR)
+	pygame.display.set_caption("Boid's Algorithm")
+
+	# Presenting the freshly filled background once - the loop below only ever pushes the dirty rects
+	pygame.display.flip()
+
+	# Creating the sprite group
+	boids = pygame.sprite.Group()
+
+	# Creating the sprites
+	for i in range(NUM_BOIDS):
+		boids.add(Boid(i))
+
+	# Running the game and updating the sprites
+	run = True
+	while run:
+		for event in pygame.event.get():
+			if event.type == pygame.QUIT:
+				run = False
+
+		# Setting max frame rate to 24fps
+		clock.tick(24)
+
+		# Computes the new positions/headings for the whole flock and syncs the sprites
+		update_all()
+		boids.update()
+
+		# Erases each boid's previous patch of the screen and redraws, pushing only the changed rects to
+		# the display instead of filling and flipping the whole screen every frame
+		# blits() batches all the boids into one call, rather than Group.draw()'s blit per sprite
+		dirty_rects = []
+
+		for boid in boids:
+			screen.fill(BACKGROUND_COLOUR, boid.prev_rect)
+			dirty_rects.append(boid.prev_rect)
+			dirty_rects.append(boid.rect)
+
+		screen.blits([(boid.image, boid.rect) for boid in boids])
+		pygame.display.update(dirty_rects)
+
+	pygame.quit()
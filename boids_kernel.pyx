@@ -0,0 +1,87 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+
+# Cython version of the flocking kernel used by boids_algorithm_numpy.py
+# Build it in place with: python setup.py build_ext --inplace
+# Compiled ahead of time, so unlike the Numba kernel there's no JIT warmup on first run
+
+from libc.math cimport sqrt
+
+import numpy as np
+
+
+cpdef compute_steering(float[:, :] positions, float[:, :] headings, double viewrange_sq,
+		double align_weight, double cohesion_weight, double separation_weight):
+	"""
+	Same contract as the Numba kernel in boids_algorithm_numpy.py: returns the combined and normalized
+	alignment/cohesion/separation steering vector for every boid, with boids that have no local boids
+	getting their current heading vector back unchanged
+	"""
+	cdef Py_ssize_t n = positions.shape[0]
+	cdef Py_ssize_t i, j
+	cdef int num_local
+	cdef double align_x, align_y, com_x, com_y, sep_x, sep_y
+	cdef double coh_x, coh_y
+	cdef double dx, dy, dist_sq, inv_dist_sq, length
+
+	# The state arrays are float32 (see DTYPE in boids_algorithm_numpy.py); the accumulators stay double
+	steering_array = np.empty((n, 2), dtype=np.float32)
+	cdef float[:, ::1] steering = steering_array
+
+	for i in range(n):
+		align_x = align_y = 0
+		com_x = com_y = 0
+		sep_x = sep_y = 0
+		num_local = 0
+
+		for j in range(n):
+			if j == i:
+				continue
+
+			dx = positions[i, 0] - positions[j, 0]
+			dy = positions[i, 1] - positions[j, 1]
+			dist_sq = dx*dx + dy*dy
+
+			if dist_sq < viewrange_sq:
+				num_local += 1
+
+				align_x += headings[j, 0]
+				align_y += headings[j, 1]
+
+				com_x += positions[j, 0]
+				com_y += positions[j, 1]
+
+				inv_dist_sq = 1/max(dist_sq, 1)
+				sep_x += dx*inv_dist_sq
+				sep_y += dy*inv_dist_sq
+
+		# Boids with no local boids just keep their current heading vector
+		if num_local == 0:
+			steering[i, 0] = headings[i, 0]
+			steering[i, 1] = headings[i, 1]
+			continue
+
+		# Normalizing the alignment vector
+		length = sqrt(align_x*align_x + align_y*align_y)
+		if length > 0:
+			align_x /= length
+			align_y /= length
+
+		# Cohesion: normalized vector to the centre of mass of the local boids
+		coh_x = com_x/num_local - positions[i, 0]
+		coh_y = com_y/num_local - positions[i, 1]
+		length = sqrt(coh_x*coh_x + coh_y*coh_y)
+		if length > 0:
+			coh_x /= length
+			coh_y /= length
+
+		# Normalizing the separation vector
+		length = sqrt(sep_x*sep_x + sep_y*sep_y)
+		if length > 0:
+			sep_x /= length
+			sep_y /= length
+
+		# Combining vectors
+		steering[i, 0] = align_x*align_weight + coh_x*cohesion_weight + sep_x*separation_weight
+		steering[i, 1] = align_y*align_weight + coh_y*cohesion_weight + sep_y*separation_weight
+
+	return steering_array
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+
+# Builds the optional Cython flocking kernel for boids_algorithm_numpy.py:
+#     python setup.py build_ext --inplace
+
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+	name="boids_kernel",
+	ext_modules=cythonize("boids_kernel.pyx"),
+)